@@ -11,185 +11,291 @@ SETUP INSTRUCTIONS:
 4. Press Enter to start scraping
 
 The script will detect the page URL and use it in the output file.
+
+Firefox runs with a persistent profile (PROFILE_DIR), so the login session
+survives between runs. After the first run the script reopens the last
+scraped URL and starts straight away; delete LAST_URL_FILE to pick a new page.
 """
 
 import asyncio
 import csv
+import re
 from datetime import datetime
 from pathlib import Path
-from playwright.async_api import async_playwright
+import httpx
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError, async_playwright
 import pytz
+from selectolax.parser import HTMLParser
 
 # Configuration
 CSV_FILE_PATH = "data/screener_data.csv"
+PROFILE_DIR = Path.home() / ".cache" / "screener_pw"
+LAST_URL_FILE = PROFILE_DIR / "last_url.txt"
+MAX_CONCURRENT_REQUESTS = 5
+
+# Pulls headers and row cells out of the results table in one page.evaluate()
+# call, instead of one text_content() round-trip per cell.
+EXTRACT_JS = """
+() => {
+    const table = document.querySelector("table");
+    if (!table) return null;
+    const text = (el) => el.textContent.trim();
+
+    // Try multiple header selectors for robustness
+    let headerCells = table.querySelectorAll("thead th");
+    if (!headerCells.length) headerCells = table.querySelectorAll("tr:first-child th");
+    if (!headerCells.length) headerCells = table.querySelectorAll("tr:first-child td");
+
+    // Fallback: without tbody, skip the header row
+    let rows = table.querySelectorAll("tbody tr");
+    if (!rows.length) rows = table.querySelectorAll("tr:not(:first-child)");
+
+    return {
+        headers: [...headerCells].map(text).filter((h) => h),
+        rows: [...rows].map((row) => {
+            let cells = row.querySelectorAll("td");
+            if (!cells.length) cells = row.querySelectorAll("th");
+            return [...cells].map(text);
+        }),
+    };
+}
+"""
+
+# Highest page number listed in the pagination control, or null if there is none.
+PAGE_COUNT_JS = """
+() => {
+    const items = document.querySelectorAll(".pagination a, .pagination span, ul.pagination li");
+    const pages = [...items]
+        .map((el) => parseInt(el.textContent.trim(), 10))
+        .filter((n) => !isNaN(n));
+    return pages.length ? Math.max(...pages) : null;
+}
+"""
+
+
+def is_page_response(response):
+    """Match the request that delivers the next page of results."""
+    return "page=" in response.url or "/api/" in response.url
+
+
+def page_number_pattern(page_number):
+    """Match a URL whose page query parameter is page_number."""
+    return re.compile(rf"[?&]page={page_number}(&|$)")
+
+
+def parse_table(html):
+    """Parse the data rows of the first table in an HTML page (server-side twin of EXTRACT_JS).
+
+    Returns None if the page has no table at all.
+    """
+    table = HTMLParser(html).css_first("table")
+    if table is None:
+        return None
+    
+    # Fallback: without tbody, skip the header row
+    rows = table.css("tbody tr") or table.css("tr")[1:]
+    
+    parsed_rows = []
+    for row in rows:
+        cells = row.css("td") or row.css("th")
+        parsed_rows.append([cell.text().strip() for cell in cells])
+    return parsed_rows
+
+
+async def fetch_remaining_pages(page, page_url, total_pages):
+    """Fetch pages 2..total_pages concurrently over HTTP, reusing the browser's session cookies."""
+    jar = httpx.Cookies()
+    for cookie in await page.context.cookies():
+        jar.set(cookie["name"], cookie["value"], domain=cookie["domain"])
+    user_agent = await page.evaluate("() => navigator.userAgent")
+    
+    sem = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    async with httpx.AsyncClient(
+        cookies=jar,
+        headers={"User-Agent": user_agent},
+        http2=True,
+        limits=httpx.Limits(max_connections=8),
+        timeout=30,
+    ) as client:
+        async def fetch(page_number):
+            async with sem:
+                # copy_set_param keeps the screen's own query (sort, order, query, ...)
+                response = await client.get(httpx.URL(page_url).copy_set_param("page", page_number))
+            response.raise_for_status()
+            rows = parse_table(response.text)
+            if rows is None:
+                # e.g. a login page or interstitial served with status 200
+                raise ValueError(f"No table found on page {page_number}")
+            return rows
+        
+        return await asyncio.gather(*(fetch(p) for p in range(2, total_pages + 1)))
+
 
 async def scrape_screener_data():
     """Scrape all paginated data from Screener.in and save to CSV."""
     
-    all_rows = []
+    total_rows = 0
     headers = None
     page_count = 0
     page_url = None
     
     async with async_playwright() as p:
-        # Connect to existing Firefox instance or launch new one
-        browser = await p.firefox.launch(headless=False)
-        page = await browser.new_page()
+        # Persistent profile keeps cookies, login session and cache between runs
+        browser = await p.firefox.launch_persistent_context(PROFILE_DIR, headless=False)
+        page = browser.pages[0] if browser.pages else await browser.new_page()
         
         print(f"\n{'='*70}")
         print("SCREENER.IN DATA SCRAPER")
         print(f"{'='*70}")
-        print(f"\nIMPORTANT: If a new Firefox window opened, please:")
-        print("1. Navigate to your Screener page")
-        print("2. Wait for the data table to fully load")
-        print("3. Return to this terminal and press Enter when ready")
-        print(f"{'='*70}\n")
-        
-        input("Press Enter once you have the Screener page loaded in Firefox...")
-        
-        # Detect the current page URL
-        page_url = page.url
-        print(f"\n✓ Detected URL: {page_url}\n")
         
-        while True:
-            page_count += 1
-            print(f"\n📄 Scraping page {page_count}...")
+        if LAST_URL_FILE.exists():
+            # Reuse the page set up on a previous run
+            page_url = LAST_URL_FILE.read_text(encoding="utf-8").strip()
+            print(f"\nReopening last scraped page (delete {LAST_URL_FILE} to choose another)")
+            print(f"{'='*70}\n")
+            await page.goto(page_url)
+        else:
+            print(f"\nIMPORTANT: If a new Firefox window opened, please:")
+            print("1. Navigate to your Screener page")
+            print("2. Wait for the data table to fully load")
+            print("3. Return to this terminal and press Enter when ready")
+            print(f"{'='*70}\n")
             
-            # Wait for table with extended timeout
-            try:
-                await page.wait_for_selector("table", timeout=2000)
-                print("   ✓ Table element found")
-            except Exception as e:
-                print(f"⚠️  Timeout waiting for table element")
-                # Debug: Save screenshot and HTML for inspection
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                await page.screenshot(path=f"debug_screenshot_{timestamp}.png")
-                html_content = await page.content()
-                with open(f"debug_html_{timestamp}.txt", "w", encoding="utf-8") as f:
-                    f.write(html_content)
-                print(f"   Debug files saved: debug_screenshot_{timestamp}.png, debug_html_{timestamp}.txt")
-                break
+            input("Press Enter once you have the Screener page loaded in Firefox...")
             
-            # Check if table exists
-            table_exists = await page.query_selector("table")
-            if not table_exists:
-                print("❌ No table found on page. Pagination may have ended.")
-                break
+            # Detect the current page URL
+            page_url = page.url
+            LAST_URL_FILE.write_text(page_url, encoding="utf-8")
+        print(f"\n✓ Detected URL: {page_url}\n")
+        
+        # Locators re-resolve lazily, so one instance serves every page
+        next_button = page.locator("a:has-text('Next'), a.next").first
+        
+        # Stream rows to the CSV page by page so progress survives a crash
+        csv_path = Path(CSV_FILE_PATH)
+        # An empty file (e.g. left by a run that found no headers) still needs metadata and headers
+        file_exists = csv_path.exists() and csv_path.stat().st_size > 0
+        
+        with open(csv_path, "a", newline="", encoding="utf-8", buffering=1 << 16) as csv_file:
+            writer = csv.writer(csv_file)
             
-            # Extract headers from first page
-            if headers is None:
-                # Try multiple header selectors for robustness
-                header_cells = await page.query_selector_all("table thead th")
-                if not header_cells:
-                    header_cells = await page.query_selector_all("table tr:first-child th")
-                if not header_cells:
-                    header_cells = await page.query_selector_all("table tr:first-child td")
+            while True:
+                page_count += 1
+                print(f"\n📄 Scraping page {page_count}...")
                 
-                headers = [await cell.text_content() for cell in header_cells]
-                headers = [h.strip() for h in headers if h.strip()]
+                # Wait for table with extended timeout
+                try:
+                    await page.wait_for_selector("table", timeout=2000)
+                    print("   ✓ Table element found")
+                except Exception as e:
+                    print(f"⚠️  Timeout waiting for table element")
+                    # Debug: Save screenshot and HTML for inspection
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    await page.screenshot(path=f"debug_screenshot_{timestamp}.png")
+                    html_content = await page.content()
+                    with open(f"debug_html_{timestamp}.txt", "w", encoding="utf-8") as f:
+                        f.write(html_content)
+                    print(f"   Debug files saved: debug_screenshot_{timestamp}.png, debug_html_{timestamp}.txt")
+                    break
                 
-                if not headers:
-                    print("❌ No headers found. Trying alternative extraction...")
-                    # Fallback 1: Extract from first row of tds
-                    first_row = await page.query_selector("table tr")
-                    if first_row:
-                        first_cells = await first_row.query_selector_all("td, th")
-                        headers = [await cell.text_content() for cell in first_cells]
-                        headers = [h.strip() for h in headers if h.strip()]
-                    
+                # Extract headers and rows in a single round-trip to the browser
+                result = await page.evaluate(EXTRACT_JS)
+                if result is None:
+                    print("❌ No table found on page. Pagination may have ended.")
+                    break
+                
+                # Extract headers from first page
+                if headers is None:
+                    headers = result["headers"]
                     if not headers:
-                        print("❌ Still no headers found. Unable to parse table structure.")
+                        print("❌ No headers found. Unable to parse table structure.")
                         await browser.close()
                         return
-                print(f"   ✓ Found {len(headers)} columns")
-            
-            # Extract row data - try multiple selectors for robustness
-            rows = await page.query_selector_all("table tbody tr")
-            if not rows:
-                # Fallback: try without tbody
-                rows = await page.query_selector_all("table tr:not(:first-child)")
-            
-            rows_extracted = 0
-            for row in rows:
-                cells = await row.query_selector_all("td")
-                if not cells:
-                    cells = await row.query_selector_all("th")  # In case it's a header row
-                row_data = [await cell.text_content() for cell in cells]
-                row_data = [cell.strip() for cell in row_data]
-                if row_data and len(row_data) > 1:  # Skip empty rows
-                    all_rows.append(row_data)
-                    rows_extracted += 1
-            
-            print(f"   ✓ Extracted {rows_extracted} rows")
-            
-            # Check if Next button exists and is enabled
-            try:
-                # Try multiple selectors for the Next button
-                next_button = await page.query_selector("a:has-text('Next')")
-                if not next_button:
-                    next_button = await page.query_selector("a:contains('Next')")
-                if not next_button:
-                    # Look for any link with text containing "Next"
-                    all_links = await page.query_selector_all("a")
-                    for link in all_links:
-                        link_text = await link.text_content()
-                        if "Next" in link_text:
-                            next_button = link
+                    print(f"   ✓ Found {len(headers)} columns")
+                    
+                    # Add metadata and headers only if file is new
+                    if not file_exists:
+                        tz = pytz.timezone('Asia/Kolkata')
+                        timestamp = datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S %Z")
+                        writer.writerow([f"Source: {page_url}"])
+                        writer.writerow([f"Extracted: {timestamp}"])
+                        writer.writerow([])  # Blank line for clarity
+                        writer.writerow(headers)
+                
+                page_rows = [row for row in result["rows"] if len(row) > 1]  # Skip empty rows
+                writer.writerows(page_rows)
+                csv_file.flush()
+                total_rows += len(page_rows)
+                
+                print(f"   ✓ Extracted {len(page_rows)} rows")
+                
+                # Page URLs are deterministic (?page=N), so fetch the rest directly
+                # instead of clicking through them in the browser
+                if page_count == 1:
+                    total_pages = await page.evaluate(PAGE_COUNT_JS)
+                    if total_pages and total_pages > 1:
+                        print(f"\n🌐 Fetching pages 2-{total_pages} directly...")
+                        try:
+                            remaining_pages = await fetch_remaining_pages(page, page_url, total_pages)
+                        except Exception as e:
+                            print(f"⚠️  Direct fetch failed ({e}). Falling back to clicking Next.")
+                        else:
+                            for rows in remaining_pages:
+                                page_rows = [row for row in rows if len(row) > 1]
+                                writer.writerows(page_rows)
+                                csv_file.flush()
+                                total_rows += len(page_rows)
+                            page_count = total_pages
+                            print(f"   ✓ Extracted {total_rows} rows across {total_pages} pages")
                             break
                 
-                if next_button:
-                    # Check if button's parent li is disabled
-                    parent_li = await next_button.evaluate("el => el.closest('li')")
-                    if parent_li:
-                        is_disabled = await page.evaluate("(li) => li.classList.contains('disabled')", parent_li)
+                # Check if Next button exists and is enabled
+                try:
+                    if await next_button.count():
+                        # Check if button's parent li is disabled
+                        is_disabled = await next_button.evaluate(
+                            "el => el.closest('li')?.classList.contains('disabled') ?? false"
+                        )
                         if is_disabled:
                             print("\n✅ Reached last page. Pagination complete.")
                             break
-                    
-                    print("   Clicking Next button...")
-                    await next_button.click()
-                    # Wait for new content to load
-                    await asyncio.sleep(2)
-                    await page.wait_for_load_state("networkidle")
-                    print("   ✓ Page loaded")
-                else:
-                    print("\n✅ No more 'Next' button found. Pagination complete.")
+                        
+                        print("   Clicking Next button...")
+                        # Resume as soon as the next page's data arrives
+                        try:
+                            async with page.expect_response(is_page_response, timeout=10000):
+                                await next_button.click()
+                        except PlaywrightTimeoutError:
+                            pass  # Checked below
+                        
+                        # A matching response may be an unrelated XHR, so carry on only once the
+                        # page has really advanced and its document is parsed; otherwise the same
+                        # rows would be scraped again
+                        try:
+                            await page.wait_for_url(
+                                page_number_pattern(page_count + 1),
+                                wait_until="domcontentloaded",
+                                timeout=5000,
+                            )
+                        except PlaywrightTimeoutError:
+                            print(f"❌ Page {page_count + 1} did not load. Stopping scrape.")
+                            break
+                        print("   ✓ Page loaded")
+                    else:
+                        print("\n✅ No more 'Next' button found. Pagination complete.")
+                        break
+                except Exception as e:
+                    print(f"❌ Pagination error: {e}")
+                    print("   Stopping scrape.")
                     break
-            except Exception as e:
-                print(f"❌ Pagination error: {e}")
-                print("   Stopping scrape.")
-                break
-        
+            
         await browser.close()
     
-    # Write to CSV
-    csv_path = Path(CSV_FILE_PATH)
-    file_exists = csv_path.exists()
-    
-    with open(csv_path, "a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        
-        # Add metadata on first line only if file is new
-        if not file_exists:
-            tz = pytz.timezone('Asia/Kolkata')
-            timestamp = datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S %Z")
-            writer.writerow([f"Source: {page_url}"])
-            writer.writerow([f"Extracted: {timestamp}"])
-            writer.writerow([])  # Blank line for clarity
-        
-        # Write headers only on new file
-        if not file_exists and headers:
-            writer.writerow(headers)
-        
-        # Write all data rows
-        if all_rows:
-            writer.writerows(all_rows)
-    
     print(f"\n{'='*70}")
     print("✓ SCRAPING COMPLETE")
     print(f"{'='*70}")
     print(f"Total pages scraped: {page_count}")
-    print(f"Total rows extracted: {len(all_rows)}")
+    print(f"Total rows extracted: {total_rows}")
     print(f"CSV file: {csv_path.absolute()}")
     print(f"{'='*70}\n")
 
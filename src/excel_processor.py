@@ -2,9 +2,13 @@
 
 import logging
 from typing import Dict, Any
+import numpy as np
 from openpyxl import Workbook, load_workbook
 from openpyxl.worksheet.worksheet import Worksheet
 
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
 
 class ExcelProcessor:
     """
@@ -19,9 +23,7 @@ class ExcelProcessor:
             file_path (str): Path to the Excel file.
         """
         self.file_path = file_path
-        self.excel_reader = ExcelReader(file_path)
         self.calculator = Calculator()
-        self.excel_writer = ExcelWriter(file_path)
         self.error_handler = ErrorHandler()
         
     def process(self, input_sheet: str, output_sheet: str, calculations: Dict[str, Any]) -> None:
@@ -34,16 +36,22 @@ class ExcelProcessor:
             calculations (Dict[str, Any]): Dictionary of calculations to perform.
         """
         try:
+            # Loaded once and shared, so reading and writing parse the file only once
+            workbook = load_workbook(self.file_path)
+            excel_reader = ExcelReader(workbook)
+            excel_writer = ExcelWriter(workbook, self.file_path)
+            
             # Read data from the input sheet
-            data = self.excel_reader.read_sheet(input_sheet)
+            data = excel_reader.read_sheet(input_sheet)
             
             # Perform calculations
             results = self.calculator.calculate(data, calculations)
             
             # Write results to the output sheet
-            self.excel_writer.write_sheet(output_sheet, results)
+            excel_writer.write_sheet(output_sheet, results)
+            excel_writer.save()
             
-            logging.info("Processing completed successfully.")
+            logger.info("Processing completed successfully.")
         except Exception as e:
             self.error_handler.handle_error(e)
             raise
@@ -54,14 +62,14 @@ class ExcelReader:
     Class to read data from Excel files.
     """
     
-    def __init__(self, file_path: str):
+    def __init__(self, workbook: Workbook):
         """
-        Initialize the ExcelReader with the file path.
+        Initialize the ExcelReader with an open workbook.
         
         Args:
-            file_path (str): Path to the Excel file.
+            workbook (Workbook): The workbook to read from.
         """
-        self.file_path = file_path
+        self.workbook = workbook
         
     def read_sheet(self, sheet_name: str) -> Dict[str, Any]:
         """
@@ -73,14 +81,9 @@ class ExcelReader:
         Returns:
             Dict[str, Any]: Data read from the sheet.
         """
-        try:
-            workbook = load_workbook(self.file_path)
-            sheet = workbook[sheet_name]
-            data = self._parse_sheet(sheet)
-            return data
-        except Exception as e:
-            ErrorHandler().handle_error(e)
-            raise
+        sheet = self.workbook[sheet_name]
+        data = self._parse_sheet(sheet)
+        return data
     
     def _parse_sheet(self, sheet: Worksheet) -> Dict[str, Any]:
         """
@@ -92,11 +95,28 @@ class ExcelReader:
         Returns:
             Dict[str, Any]: Parsed data.
         """
-        data = {}
-        for row in sheet.iter_rows(values_only=True):
-            if row and row[0]:
-                data[row[0]] = row[1:]
-        return data
+        return {
+            row[0]: self._to_array(row[1:])
+            for row in sheet.iter_rows(values_only=True)
+            if row and row[0]
+        }
+    
+    def _to_array(self, values: tuple) -> Any:
+        """
+        Convert a row's values to a float64 array once, at load time.
+        
+        Blank cells (None) are dropped first; converting them would store NaN.
+        
+        Args:
+            values (tuple): Cell values following the row key.
+        
+        Returns:
+            Any: A NumPy array, or the original tuple for non-numeric rows.
+        """
+        try:
+            return np.asarray([value for value in values if value is not None], dtype=np.float64)
+        except (TypeError, ValueError):
+            return values
 
 
 class Calculator:
@@ -104,6 +124,14 @@ class Calculator:
     Class to perform calculations on the data.
     """
     
+    # Supported calculations, mapped to their NumPy reductions
+    _OPS = {
+        "sum": np.sum,
+        "average": np.mean,
+        "min": np.min,
+        "max": np.max,
+    }
+    
     def calculate(self, data: Dict[str, Any], calculations: Dict[str, Any]) -> Dict[str, Any]:
         """
         Perform calculations on the data.
@@ -132,13 +160,16 @@ class Calculator:
         Returns:
             Any: Result of the calculation.
         """
-        # Example calculation: sum of all values
-        if calculation == "sum":
-            return sum(input_data)
-        elif calculation == "average":
-            return sum(input_data) / len(input_data)
-        else:
+        operation = self._OPS.get(calculation)
+        if operation is None:
             raise ValueError(f"Unsupported calculation: {calculation}")
+        values = np.asarray(input_data, dtype=np.float64)
+        # Blank cells convert to NaN; skip them rather than let them poison the result
+        values = values[~np.isnan(values)]
+        # An empty sum is 0, but average/min/max have no value to return
+        if values.size == 0 and calculation != "sum":
+            raise ValueError(f"No values for calculation: {calculation}")
+        return operation(values).item()
 
 
 class ExcelWriter:
@@ -146,35 +177,42 @@ class ExcelWriter:
     Class to write data back to Excel files.
     """
     
-    def __init__(self, file_path: str):
+    def __init__(self, workbook: Workbook, file_path: str):
         """
-        Initialize the ExcelWriter with the file path.
+        Initialize the ExcelWriter with an open workbook and its file path.
         
         Args:
-            file_path (str): Path to the Excel file.
+            workbook (Workbook): The workbook to write to.
+            file_path (str): Path the workbook is saved to.
         """
+        self.workbook = workbook
         self.file_path = file_path
         
     def write_sheet(self, sheet_name: str, data: Dict[str, Any]) -> None:
         """
         Write data to a specified sheet.
         
+        An existing sheet is cleared first, so any content already on it
+        (including rows not produced by a previous run) is removed.
+        
         Args:
             sheet_name (str): Name of the sheet to write to.
             data (Dict[str, Any]): Data to write.
         """
-        try:
-            workbook = load_workbook(self.file_path)
-            if sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
-            else:
-                sheet = workbook.create_sheet(sheet_name)
-            
-            self._write_data(sheet, data)
-            workbook.save(self.file_path)
-        except Exception as e:
-            ErrorHandler().handle_error(e)
-            raise
+        if sheet_name in self.workbook.sheetnames:
+            sheet = self.workbook[sheet_name]
+            # Results are regenerated in full, so drop everything already there
+            sheet.delete_rows(1, sheet.max_row)
+        else:
+            sheet = self.workbook.create_sheet(sheet_name)
+        
+        self._write_data(sheet, data)
+    
+    def save(self) -> None:
+        """
+        Save the workbook back to the Excel file.
+        """
+        self.workbook.save(self.file_path)
     
     def _write_data(self, sheet: Worksheet, data: Dict[str, Any]) -> None:
         """
@@ -184,13 +222,11 @@ class ExcelWriter:
             sheet (Worksheet): The worksheet to write to.
             data (Dict[str, Any]): Data to write.
         """
-        for row_idx, (key, values) in enumerate(data.items(), start=1):
-            sheet.cell(row=row_idx, column=1, value=key)
+        for key, values in data.items():
             if isinstance(values, (list, tuple)):
-                for col_idx, value in enumerate(values, start=2):
-                    sheet.cell(row=row_idx, column=col_idx, value=value)
+                sheet.append([key, *values])
             else:
-                sheet.cell(row=row_idx, column=2, value=values)
+                sheet.append([key, values])
 
 
 class ErrorHandler:
@@ -198,18 +234,11 @@ class ErrorHandler:
     Class to handle errors and logging.
     """
     
-    def __init__(self):
-        """
-        Initialize the ErrorHandler.
-        """
-        logging.basicConfig(level=logging.INFO)
-        
     def handle_error(self, error: Exception) -> None:
         """
-        Handle errors and log them.
+        Log an error. Re-raising is left to the caller.
         
         Args:
             error (Exception): The error to handle.
         """
-        logging.error(f"An error occurred: {error}")
-        raise error
\ No newline at end of file
+        logger.exception("An error occurred: %s", error)
\ No newline at end of file
@@ -1,9 +1,27 @@
 """Trial Balance processor for Manufacturing Accounting workbook."""
 
+from functools import cached_property
+from operator import itemgetter
 from typing import Dict, List, Tuple
-from openpyxl import load_workbook
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.worksheet._read_only import ReadOnlyWorksheet
 from openpyxl.worksheet.worksheet import Worksheet
 
+# Chart of Accounts codes referenced by the financial statements
+CASH = 1000
+ACCOUNTS_RECEIVABLE = 1100
+INVENTORY = 1200
+ACCOUNTS_PAYABLE = 2000
+SHARE_CAPITAL = 3000
+RETAINED_EARNINGS = 3100
+SALES = 4000
+COGS = 5000
+SALARIES = 5100
+
+# (Debit, Credit) for accounts with no Trial Balance entry
+NO_BALANCE = (0, 0)
+
 
 class TrialBalanceProcessor:
     """Processes and populates the Trial Balance sheet from source data."""
@@ -16,7 +34,34 @@ class TrialBalanceProcessor:
             file_path (str): Path to the Excel file.
         """
         self.file_path = file_path
-        self.workbook = load_workbook(file_path)
+
+    @cached_property
+    def workbook(self) -> Workbook:
+        """Editable workbook, loaded on first access."""
+        return load_workbook(self.file_path)
+
+    @cached_property
+    def _tb_map(self) -> Dict[int, Tuple[float, float]]:
+        """
+        Trial Balance data shared by the Income Statement and Balance Sheet.
+
+        Returns:
+            Dict[int, Tuple[float, float]]: Mapping of Account Code to (Debit, Credit).
+        """
+        trial_balance = self.workbook["Trial_Balance"]
+        tb_map = {}
+        for row in trial_balance.iter_rows(min_row=2, max_col=4, values_only=True):
+            # Codes may come back as text if the column is formatted that way
+            try:
+                account_code = int(row[0])
+            except (TypeError, ValueError):
+                continue
+            tb_map[account_code] = (row[2] or 0, row[3] or 0)
+        return tb_map
+
+    def commit(self) -> None:
+        """Save all populated sheets back to the Excel file."""
+        self.workbook.save(self.file_path)
 
     def populate_trial_balance(self) -> None:
         """
@@ -26,97 +71,112 @@ class TrialBalanceProcessor:
         1. Load Chart_of_Accounts and populate Account Code and Account Name
         2. Load General_Ledger and sum Debit/Credit amounts by Account Code
         3. Write results to Trial_Balance sheet
+
+        Changes are kept in memory until commit() is called.
         """
-        # Get source sheets
-        chart_of_accounts = self.workbook["Chart_of_Accounts"]
-        general_ledger = self.workbook["General_Ledger"]
         trial_balance = self.workbook["Trial_Balance"]
 
-        # Step 1: Extract Chart of Accounts data
-        accounts_map = self._load_chart_of_accounts(chart_of_accounts)
+        # Source sheets are only read, so stream them from one read-only copy
+        source = load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            # Step 1: Extract Chart of Accounts data
+            accounts_map = self._load_chart_of_accounts(source["Chart_of_Accounts"])
 
-        # Step 2: Aggregate debits and credits from General Ledger
-        ledger_summary = self._aggregate_ledger(general_ledger)
+            # Step 2: Aggregate debits and credits from General Ledger
+            # (must come last: pandas closes the workbook when it is done)
+            ledger_summary = self._aggregate_ledger(source)
+        finally:
+            source.close()
 
         # Step 3: Populate Trial Balance sheet
         self._write_trial_balance(trial_balance, accounts_map, ledger_summary)
 
-        # Save the workbook
-        self.workbook.save(self.file_path)
+        # Trial Balance changed, so rebuild its data map on next access
+        self.__dict__.pop("_tb_map", None)
 
     def _load_chart_of_accounts(
-        self, sheet: Worksheet
-    ) -> Dict[str, str]:
+        self, sheet: ReadOnlyWorksheet
+    ) -> Dict[int, str]:
         """
         Load the Chart of Accounts mapping.
 
         Args:
-            sheet (Worksheet): The Chart_of_Accounts sheet.
+            sheet (ReadOnlyWorksheet): The Chart_of_Accounts sheet.
 
         Returns:
-            Dict[str, str]: Mapping of Account Code to Account Name.
+            Dict[int, str]: Mapping of Account Code to Account Name.
         """
         accounts_map = {}
         # Skip header row (row 1)
-        for row in sheet.iter_rows(min_row=2, values_only=False):
-            account_code = row[0].value
-            account_name = row[1].value
-            if account_code:
-                accounts_map[account_code] = account_name
+        for row in sheet.iter_rows(min_row=2, max_col=2, values_only=True):
+            # Codes may come back as text if the column is formatted that way
+            try:
+                account_code = int(row[0])
+            except (TypeError, ValueError):
+                continue
+            accounts_map[account_code] = row[1]
         return accounts_map
 
-    def _aggregate_ledger(self, sheet: Worksheet) -> Dict[str, Tuple[float, float]]:
+    def _aggregate_ledger(self, source: Workbook) -> Dict[int, Tuple[float, float]]:
         """
         Aggregate debit and credit amounts from General Ledger by Account Code.
 
         Args:
-            sheet (Worksheet): The General_Ledger sheet.
+            source (Workbook): Open read-only workbook; pandas closes it after reading.
 
         Returns:
-            Dict[str, Tuple[float, float]]: Mapping of Account Code to (Debit, Credit) totals.
+            Dict[int, Tuple[float, float]]: Mapping of Account Code to (Debit, Credit) totals.
         """
-        ledger_summary = {}
-        # Skip header row (row 1)
-        for row in sheet.iter_rows(min_row=2, values_only=False):
-            account_code = row[2].value  # Column C: Account Code
-            debit = row[3].value or 0  # Column D: Debit
-            credit = row[4].value or 0  # Column E: Credit
-
-            if account_code:
-                if account_code not in ledger_summary:
-                    ledger_summary[account_code] = (0, 0)
-                current_debit, current_credit = ledger_summary[account_code]
-                ledger_summary[account_code] = (
-                    current_debit + debit,
-                    current_credit + credit,
-                )
-        return ledger_summary
+        # Columns C, D, E: Account Code, Debit, Credit (header row is skipped)
+        ledger = pd.read_excel(
+            source,
+            sheet_name="General_Ledger",
+            usecols=[2, 3, 4],
+            names=["AccountCode", "Debit", "Credit"],
+            header=0,
+            engine="openpyxl",
+            dtype_backend="numpy_nullable",
+        )
+        # Normalize Account Codes to int, dropping blank or non-numeric ones
+        ledger["AccountCode"] = pd.to_numeric(ledger["AccountCode"], errors="coerce")
+        ledger = ledger.dropna(subset=["AccountCode"]).fillna(0)
+        ledger["AccountCode"] = ledger["AccountCode"].astype(int)
+        totals = ledger.groupby("AccountCode")[["Debit", "Credit"]].sum()
+        # tolist() hands back native Python scalars rather than NumPy ones
+        return dict(
+            zip(
+                totals.index.tolist(),
+                zip(totals["Debit"].tolist(), totals["Credit"].tolist()),
+            )
+        )
 
     def _write_trial_balance(
         self,
         sheet: Worksheet,
-        accounts_map: Dict[str, str],
-        ledger_summary: Dict[str, Tuple[float, float]],
+        accounts_map: Dict[int, str],
+        ledger_summary: Dict[int, Tuple[float, float]],
     ) -> None:
         """
         Write aggregated data to the Trial Balance sheet.
 
         Args:
             sheet (Worksheet): The Trial_Balance sheet.
-            accounts_map (Dict[str, str]): Account Code to Account Name mapping.
-            ledger_summary (Dict[str, Tuple[float, float]]): Account Code to (Debit, Credit).
+            accounts_map (Dict[int, str]): Account Code to Account Name mapping.
+            ledger_summary (Dict[int, Tuple[float, float]]): Account Code to (Debit, Credit).
         """
-        row_num = 2  # Start from row 2 (row 1 is header)
-        for account_code in sorted(accounts_map.keys()):
-            account_name = accounts_map[account_code]
-            debit, credit = ledger_summary.get(account_code, (0, 0))
+        # Clear any previous rows below the header (row 1) so append starts at row 2
+        if sheet.max_row > 1:
+            sheet.delete_rows(2, sheet.max_row - 1)
 
-            sheet.cell(row=row_num, column=1, value=account_code)  # Account Code
-            sheet.cell(row=row_num, column=2, value=account_name)  # Account Name
-            sheet.cell(row=row_num, column=3, value=debit)  # Debit
-            sheet.cell(row=row_num, column=4, value=credit)  # Credit
+        # Account Code, Account Name, Debit, Credit
+        rows = [
+            (account_code, account_name, *ledger_summary.get(account_code, NO_BALANCE))
+            for account_code, account_name in accounts_map.items()
+        ]
+        rows.sort(key=itemgetter(0))
 
-            row_num += 1
+        for row in rows:
+            sheet.append(row)
 
     def populate_income_statement(self) -> None:
         """
@@ -129,22 +189,16 @@ class TrialBalanceProcessor:
         - Salaries Expense: from account 5100 (Debit - Credit)
         - Net Profit: Gross Profit - Salaries Expense
         """
-        trial_balance = self.workbook["Trial_Balance"]
         income_statement = self.workbook["Income_Statement"]
-
-        # Build Trial Balance data map
-        tb_data = {}
-        for row in trial_balance.iter_rows(min_row=2, values_only=False):
-            account_code = row[0].value
-            debit = row[2].value or 0
-            credit = row[3].value or 0
-            if account_code:
-                tb_data[account_code] = (debit, credit)
+        tb_data = self._tb_map
 
         # Calculate amounts
-        sales_revenue = tb_data.get(4000, (0, 0))[1] - tb_data.get(4000, (0, 0))[0]  # Credit - Debit
-        cogs = tb_data.get(5000, (0, 0))[0] - tb_data.get(5000, (0, 0))[1]  # Debit - Credit
-        salaries = tb_data.get(5100, (0, 0))[0] - tb_data.get(5100, (0, 0))[1]  # Debit - Credit
+        sales_debit, sales_credit = tb_data.get(SALES, NO_BALANCE)
+        cogs_debit, cogs_credit = tb_data.get(COGS, NO_BALANCE)
+        salaries_debit, salaries_credit = tb_data.get(SALARIES, NO_BALANCE)
+        sales_revenue = sales_credit - sales_debit  # Credit - Debit
+        cogs = cogs_debit - cogs_credit  # Debit - Credit
+        salaries = salaries_debit - salaries_credit  # Debit - Credit
         gross_profit = sales_revenue - cogs
         net_profit = gross_profit - salaries
 
@@ -155,9 +209,6 @@ class TrialBalanceProcessor:
         income_statement.cell(row=5, column=2, value=salaries)
         income_statement.cell(row=6, column=2, value=net_profit)
 
-        # Save the workbook
-        self.workbook.save(self.file_path)
-
     def populate_balance_sheet(self) -> None:
         """
         Populate the Balance_Sheet sheet from Trial Balance data.
@@ -165,46 +216,33 @@ class TrialBalanceProcessor:
         Balance Sheet amounts are net of debits and credits.
         For all accounts: Amount = Credit - Debit
         """
-        trial_balance = self.workbook["Trial_Balance"]
         balance_sheet = self.workbook["Balance_Sheet"]
-
-        # Build Trial Balance data map
-        tb_data = {}
-        for row in trial_balance.iter_rows(min_row=2, values_only=False):
-            account_code = row[0].value
-            account_name = row[1].value
-            debit = row[2].value or 0
-            credit = row[3].value or 0
-            if account_code:
-                tb_data[account_code] = (debit, credit)
+        tb_data = self._tb_map
 
         # Asset accounts: 1000 (Cash), 1100 (A/R), 1200 (Inventory), 1500 (Plant & Machinery)
         assets_map = {
-            "Cash at Bank": 1000,
-            "Inventory": 1200,
-            "Accounts Receivable": 1100,
+            "Cash at Bank": CASH,
+            "Inventory": INVENTORY,
+            "Accounts Receivable": ACCOUNTS_RECEIVABLE,
         }
 
         # Liability & Equity accounts: 3000 (Capital), 2000 (A/P), 3100 (Retained Earnings)
         liabilities_equity_map = {
-            "Equity Share Capital": 3000,
-            "Accounts Payable": 2000,
-            "Retained Earnings": 3100,
+            "Equity Share Capital": SHARE_CAPITAL,
+            "Accounts Payable": ACCOUNTS_PAYABLE,
+            "Retained Earnings": RETAINED_EARNINGS,
         }
 
         # Write Assets (rows 2-4, column 2)
         asset_rows = [2, 3, 4]
         for row_idx, (asset_name, account_code) in enumerate(assets_map.items()):
-            debit, credit = tb_data.get(account_code, (0, 0))
+            debit, credit = tb_data.get(account_code, NO_BALANCE)
             amount = credit - debit
             balance_sheet.cell(row=asset_rows[row_idx], column=2, value=amount)
 
         # Write Liabilities & Equity (rows 2-4, column 4)
         le_rows = [2, 3, 4]
         for row_idx, (le_name, account_code) in enumerate(liabilities_equity_map.items()):
-            debit, credit = tb_data.get(account_code, (0, 0))
+            debit, credit = tb_data.get(account_code, NO_BALANCE)
             amount = credit - debit
             balance_sheet.cell(row=le_rows[row_idx], column=4, value=amount)
-
-        # Save the workbook
-        self.workbook.save(self.file_path)
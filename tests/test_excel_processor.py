@@ -3,7 +3,7 @@
 import os
 import pytest
 from openpyxl import Workbook, load_workbook
-from src.excel_processor import ExcelProcessor
+from src.excel_processor import ExcelProcessor, ExcelReader
 
 
 @pytest.fixture
@@ -47,3 +47,113 @@ def test_process(excel_file):  # pylint: disable=redefined-outer-name
     output_sheet = workbook["Output"]
     assert output_sheet["B1"].value == 10  # Sum of Value1
     assert output_sheet["B2"].value == 20  # Average of Value2
+
+
+@pytest.fixture
+def ragged_excel_file():
+    """
+    Set up an input sheet whose rows have different lengths.
+    """
+    test_file = "test_ragged_data.xlsx"
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "Input"
+    sheet.append(["Value1", 10, 20])
+    sheet.append(["Value2", 30])
+    sheet.append(["Value3"])
+    workbook.save(test_file)
+    yield test_file
+
+    # Clean up the test environment
+    if os.path.exists(test_file):
+        os.remove(test_file)
+
+
+def test_process_min_max(ragged_excel_file):  # pylint: disable=redefined-outer-name
+    """
+    Test the min and max calculations.
+    """
+    processor = ExcelProcessor(ragged_excel_file)
+    processor.process("Input", "Min", {"Value1": "min"})
+    processor = ExcelProcessor(ragged_excel_file)
+    processor.process("Input", "Max", {"Value1": "max"})
+
+    workbook = load_workbook(ragged_excel_file)
+    assert workbook["Min"]["B1"].value == 10  # Min of Value1
+    assert workbook["Max"]["B1"].value == 20  # Max of Value1
+
+
+def test_process_ragged_rows(ragged_excel_file):  # pylint: disable=redefined-outer-name
+    """
+    Test that blank cells in shorter rows are skipped, not counted.
+    """
+    processor = ExcelProcessor(ragged_excel_file)
+    processor.process("Input", "Output", {"Value1": "average", "Value2": "average"})
+
+    output_sheet = load_workbook(ragged_excel_file)["Output"]
+    assert output_sheet["B1"].value == 15  # Average of Value1
+    assert output_sheet["B2"].value == 30  # Average of Value2, blank cell skipped
+
+
+def test_process_rerun_replaces_output(ragged_excel_file):  # pylint: disable=redefined-outer-name
+    """
+    Test that re-running into the same sheet leaves no stale rows behind.
+    """
+    processor = ExcelProcessor(ragged_excel_file)
+    processor.process("Input", "Output", {"Value1": "sum", "Value2": "sum"})
+    processor.process("Input", "Output", {"Value2": "max"})
+
+    output_sheet = load_workbook(ragged_excel_file)["Output"]
+    assert output_sheet.max_row == 1
+    assert output_sheet["A1"].value == "Value2"
+    assert output_sheet["B1"].value == 30  # Max of Value2
+
+
+def test_process_empty_row(ragged_excel_file):  # pylint: disable=redefined-outer-name
+    """
+    Test that a row with no values is rejected.
+    """
+    processor = ExcelProcessor(ragged_excel_file)
+    with pytest.raises(ValueError, match="No values"):
+        processor.process("Input", "Output", {"Value3": "average"})
+
+
+def test_process_empty_row_sum(ragged_excel_file):  # pylint: disable=redefined-outer-name
+    """
+    Test that summing a row with no values gives 0.
+    """
+    processor = ExcelProcessor(ragged_excel_file)
+    processor.process("Input", "Output", {"Value3": "sum"})
+
+    output_sheet = load_workbook(ragged_excel_file)["Output"]
+    assert output_sheet["B1"].value == 0  # Sum of empty Value3
+
+
+def test_process_unsupported_calculation(ragged_excel_file):  # pylint: disable=redefined-outer-name
+    """
+    Test that an unknown calculation raises ValueError.
+    """
+    processor = ExcelProcessor(ragged_excel_file)
+    with pytest.raises(ValueError, match="Unsupported calculation"):
+        processor.process("Input", "Output", {"Value1": "median"})
+
+
+def test_process_missing_file(caplog):
+    """
+    Test that a missing file is logged and re-raised by process.
+    """
+    processor = ExcelProcessor("missing_test_data.xlsx")
+    with pytest.raises(FileNotFoundError):
+        processor.process("Input", "Output", {"Value1": "sum"})
+    assert "An error occurred" in caplog.text
+
+
+def test_read_sheet_skips_blank_cells(ragged_excel_file):  # pylint: disable=redefined-outer-name
+    """
+    Test that ExcelReader drops blank cells instead of storing NaN.
+    """
+    reader = ExcelReader(load_workbook(ragged_excel_file))
+    data = reader.read_sheet("Input")
+    assert data["Value1"].tolist() == [10, 20]
+    assert data["Value2"].tolist() == [30]
+    assert data["Value3"].tolist() == []
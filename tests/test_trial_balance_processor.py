@@ -2,74 +2,158 @@
 
 import os
 import shutil
+from contextlib import closing
+from pathlib import Path
+import openpyxl
 import pytest
 from src.trial_balance_processor import TrialBalanceProcessor
 
+# Verification reloads use the Rust-backed, openpyxl-compatible reader when available
+try:
+    from wolfxl import load_workbook
+except ImportError:
+    from openpyxl import load_workbook
 
-@pytest.fixture
-def test_workbook():
-    """Copy the existing Manufacturing_Accounting_Simple.xlsx and return the copy path."""
-    source_file = "data/Manufacturing_Accounting_Simple.xlsx"
-    test_file = "data/test_trial_balance_output.xlsx"
+SOURCE_FILE = Path("data/Manufacturing_Accounting_Simple.xlsx")
 
-    # Copy the existing file
-    shutil.copy(source_file, test_file)
-    yield test_file
+# Account codes in the Chart_of_Accounts of SOURCE_FILE
+EXPECTED_CODES = frozenset({1000, 1100, 1200, 1500, 2000, 3000, 3100, 4000, 5000, 5100, 5200})
 
-    # Note: Copy is not deleted - retained for inspection
 
+def reload_workbook(file_path):
+    """Open a saved workbook read-only for verification, closing it when the block exits."""
+    return closing(load_workbook(file_path, read_only=True, data_only=True, keep_links=False))
 
-def test_populate_trial_balance(test_workbook):
-    """Test that Trial_Balance sheet is correctly populated with real manufacturing data."""
-    processor = TrialBalanceProcessor(test_workbook)
-    processor.populate_trial_balance()
 
-    # Reload the workbook to verify results
-    from openpyxl import load_workbook
+def write_codes_as_text(file_path, sheets):
+    """Rewrite the account codes in the given (sheet name, column) pairs as strings."""
+    wb = openpyxl.load_workbook(file_path)
+    for sheet_name, code_col in sheets:
+        for (cell,) in wb[sheet_name].iter_rows(min_row=2, min_col=code_col, max_col=code_col):
+            if cell.value is not None:
+                cell.value = str(cell.value)
+    wb.save(file_path)
+
+
+# Income Statement line items, in rows 2-6 of column 2
+INCOME_STATEMENT_ITEMS = ("Sales Revenue", "Cost of Goods Sold", "Gross Profit", "Salaries Expense", "Net Profit")
+
+# Balance Sheet line items and their account codes, in rows 2-4:
+# assets in column 2, liabilities & equity in column 4
+ASSET_ACCOUNTS = {"Cash at Bank": 1000, "Inventory": 1200, "Accounts Receivable": 1100}
+LIABILITY_EQUITY_ACCOUNTS = {"Equity Share Capital": 3000, "Accounts Payable": 2000, "Retained Earnings": 3100}
+
+
+def expected_statement_amounts(tb_sheet):
+    """Work out every Income Statement and Balance Sheet amount from a Trial_Balance sheet."""
+    # Build Trial Balance (Debit, Credit) per account code
+    tb_data = {
+        row[0]: (row[2], row[3])
+        for row in tb_sheet.iter_rows(min_row=2, values_only=True)
+        if row[0]
+    }
+
+    # Income is Credit - Debit, expenses are Debit - Credit
+    sales_revenue = tb_data[4000][1] - tb_data[4000][0]
+    cogs = tb_data[5000][0] - tb_data[5000][1]
+    salaries = tb_data[5100][0] - tb_data[5100][1]
+    gross_profit = sales_revenue - cogs
+    expected = {
+        "Sales Revenue": sales_revenue,
+        "Cost of Goods Sold": cogs,
+        "Gross Profit": gross_profit,
+        "Salaries Expense": salaries,
+        "Net Profit": gross_profit - salaries,
+    }
 
-    wb = load_workbook(test_workbook)
-    trial_sheet = wb["Trial_Balance"]
+    # Every Balance Sheet amount is Credit - Debit
+    for label, account_code in {**ASSET_ACCOUNTS, **LIABILITY_EQUITY_ACCOUNTS}.items():
+        expected[label] = tb_data[account_code][1] - tb_data[account_code][0]
+    return expected
 
-    # Verify data was written
-    assert trial_sheet.max_row > 1, "Trial Balance sheet should have data rows"
 
-    # Check that all accounts from Chart_of_Accounts are present
-    account_codes = []
-    for row in trial_sheet.iter_rows(min_row=2, values_only=True):
-        if row[0]:
-            account_codes.append(row[0])
+def read_income_statement(is_sheet):
+    """Read the Income Statement amounts keyed by line item."""
+    rows = is_sheet.iter_rows(min_row=2, max_row=6, min_col=2, max_col=2, values_only=True)
+    return {desc: row[0] for desc, row in zip(INCOME_STATEMENT_ITEMS, rows)}
 
-    expected_codes = [1000, 1100, 1200, 1500, 2000, 3000, 3100, 4000, 5000, 5100, 5200]
-    assert sorted(account_codes) == sorted(expected_codes), "All accounts should be populated"
 
-    # Build a map of account codes to data
-    trial_data = {}
-    for row in trial_sheet.iter_rows(min_row=2, values_only=True):
-        if row[0]:
-            trial_data[row[0]] = {"name": row[1], "debit": row[2] or 0, "credit": row[3] or 0}
+def read_balance_sheet(bs_sheet):
+    """Read the Balance Sheet amounts keyed by line item."""
+    amounts = {}
+    rows = bs_sheet.iter_rows(min_row=2, max_row=4, min_col=1, max_col=4, values_only=True)
+    for asset_name, le_name, row in zip(ASSET_ACCOUNTS, LIABILITY_EQUITY_ACCOUNTS, rows):
+        amounts[asset_name] = row[1]
+        amounts[le_name] = row[3]
+    return amounts
 
-    # Verify account names were populated correctly
-    assert trial_data[1000]["name"] == "Cash at Bank"
-    assert trial_data[1100]["name"] == "Accounts Receivable"
-    assert trial_data[2000]["name"] == "Accounts Payable"
-    assert trial_data[3000]["name"] == "Equity Share Capital"
 
-    # Verify that debits and credits are populated (exact values depend on ledger)
-    # Just verify that at least some accounts have non-zero values
-    total_debits = sum(row["debit"] for row in trial_data.values())
-    total_credits = sum(row["credit"] for row in trial_data.values())
-    assert total_debits > 0, "Should have some debits"
-    assert total_credits > 0, "Should have some credits"
+@pytest.fixture(scope="session")
+def source_bytes():
+    """Read Manufacturing_Accounting_Simple.xlsx once per test session."""
+    return SOURCE_FILE.read_bytes()
+
+
+@pytest.fixture(scope="module")
+def prepared_workbook(source_bytes):  # pylint: disable=redefined-outer-name
+    """Copy Manufacturing_Accounting_Simple.xlsx and populate its Trial Balance once per module."""
+    test_file = "data/test_trial_balance_output.xlsx"
+
+    # Copy the existing file
+    Path(test_file).write_bytes(source_bytes)
+
+    processor = TrialBalanceProcessor(test_file)
+    processor.populate_trial_balance()
+    processor.commit()
+    yield test_file
+
+    # Note: Copy is not deleted - retained for inspection
+
+
+def test_populate_trial_balance(prepared_workbook):  # pylint: disable=redefined-outer-name
+    """Test that Trial_Balance sheet is correctly populated with real manufacturing data."""
+    # Reload the workbook to verify results
+    with reload_workbook(prepared_workbook) as wb:
+        trial_sheet = wb["Trial_Balance"]
+
+        # Verify data was written
+        assert trial_sheet.max_row > 1, "Trial Balance sheet should have data rows"
+
+        # Collect account codes and a map of account codes to (name, debit, credit) in one pass
+        account_codes = []
+        trial_data = {}
+        for row in trial_sheet.iter_rows(min_row=2, values_only=True):
+            if row[0]:
+                # Every account gets numeric totals, including 0 for unused accounts
+                assert row[2] is not None and row[3] is not None, f"Account {row[0]} should have debit and credit"
+                account_codes.append(row[0])
+                trial_data[row[0]] = (row[1], row[2], row[3])
+
+        # Check that all accounts from Chart_of_Accounts are present
+        assert set(account_codes) == EXPECTED_CODES, "All accounts should be populated"
+        assert len(account_codes) == len(EXPECTED_CODES), "Each account should appear once"
+
+        # Verify account names were populated correctly
+        assert trial_data[1000][0] == "Cash at Bank"
+        assert trial_data[1100][0] == "Accounts Receivable"
+        assert trial_data[2000][0] == "Accounts Payable"
+        assert trial_data[3000][0] == "Equity Share Capital"
+
+        # Verify that debits and credits are populated (exact values depend on ledger)
+        # Just verify that at least some accounts have non-zero values
+        total_debits = sum(row[1] for row in trial_data.values())
+        total_credits = sum(row[2] for row in trial_data.values())
+        assert total_debits > 0, "Should have some debits"
+        assert total_credits > 0, "Should have some credits"
 
 
 @pytest.fixture
-def test_workbook_for_income():
-    """Copy the existing Manufacturing_Accounting_Simple.xlsx for income statement test."""
-    source_file = "data/Manufacturing_Accounting_Simple.xlsx"
+def test_workbook_for_income(prepared_workbook):  # pylint: disable=redefined-outer-name
+    """Copy the workbook with a populated Trial Balance for income statement test."""
     test_file = "data/test_income_statement_output.xlsx"
 
-    # Copy the existing file
-    shutil.copy(source_file, test_file)
+    # Copy the prepared file
+    shutil.copyfile(prepared_workbook, test_file)
     yield test_file
 
     # Note: Copy is not deleted - retained for inspection
@@ -78,134 +162,128 @@ def test_workbook_for_income():
 def test_populate_income_statement(test_workbook_for_income):
     """Test that Income_Statement sheet is correctly populated from Trial Balance."""
     processor = TrialBalanceProcessor(test_workbook_for_income)
+    processor.populate_income_statement()
+    processor.commit()
 
-    # First populate Trial Balance
-    processor.populate_trial_balance()
+    # Reload the workbook to verify results
+    with reload_workbook(test_workbook_for_income) as wb:
+        expected_amounts = expected_statement_amounts(wb["Trial_Balance"])
+        is_data = read_income_statement(wb["Income_Statement"])
+
+        # Verify each line item
+        for label, actual in is_data.items():
+            expected = expected_amounts[label]
+            assert actual == expected, f"{label} should be {expected}, got {actual}"
+
+
+@pytest.fixture
+def test_workbook_for_balance_sheet(prepared_workbook):  # pylint: disable=redefined-outer-name
+    """Copy the workbook with a populated Trial Balance for balance sheet test."""
+    test_file = "data/test_balance_sheet_output.xlsx"
+
+    # Copy the prepared file
+    shutil.copyfile(prepared_workbook, test_file)
+    yield test_file
+
+    # Note: Copy is not deleted - retained for inspection
 
-    # Then populate Income Statement
-    processor.populate_income_statement()
+
+def test_populate_balance_sheet(test_workbook_for_balance_sheet):
+    """Test that Balance_Sheet sheet is correctly populated from Trial Balance."""
+    processor = TrialBalanceProcessor(test_workbook_for_balance_sheet)
+    processor.populate_balance_sheet()
+    processor.commit()
 
     # Reload the workbook to verify results
-    from openpyxl import load_workbook
+    with reload_workbook(test_workbook_for_balance_sheet) as wb:
+        expected_amounts = expected_statement_amounts(wb["Trial_Balance"])
+        bs_data = read_balance_sheet(wb["Balance_Sheet"])
 
-    wb = load_workbook(test_workbook_for_income)
-    tb_sheet = wb["Trial_Balance"]
-    is_sheet = wb["Income_Statement"]
+        # Verify each line item
+        for label, actual in bs_data.items():
+            expected = expected_amounts[label]
+            assert actual == expected, f"{label} should be {expected}, got {actual}"
 
-    # Build Trial Balance data for verification
-    tb_data = {}
-    for row in tb_sheet.iter_rows(min_row=2, values_only=True):
-        if row[0]:
-            tb_data[row[0]] = {"debit": row[2] or 0, "credit": row[3] or 0}
 
-    # Read Income Statement values
-    is_data = {}
-    descriptions = ["Sales Revenue", "Cost of Goods Sold", "Gross Profit", "Salaries Expense", "Net Profit"]
-    for i, desc in enumerate(descriptions, start=2):
-        is_data[desc] = is_sheet.cell(row=i, column=2).value
+@pytest.fixture
+def test_workbook_with_text_codes(source_bytes):  # pylint: disable=redefined-outer-name
+    """Copy Manufacturing_Accounting_Simple.xlsx with every account code stored as text."""
+    test_file = "data/test_text_codes_output.xlsx"
 
-    # Verify Sales Revenue (account 4000: credit - debit)
-    expected_sales_revenue = tb_data[4000]["credit"] - tb_data[4000]["debit"]
-    assert is_data["Sales Revenue"] == expected_sales_revenue, f"Sales Revenue should be {expected_sales_revenue}"
+    # Copy the existing file, then rewrite Account Codes as strings
+    Path(test_file).write_bytes(source_bytes)
+    write_codes_as_text(test_file, [("Chart_of_Accounts", 1), ("General_Ledger", 3)])
+    yield test_file
 
-    # Verify COGS (account 5000: debit - credit)
-    expected_cogs = tb_data[5000]["debit"] - tb_data[5000]["credit"]
-    assert is_data["Cost of Goods Sold"] == expected_cogs, f"COGS should be {expected_cogs}"
+    # Note: Copy is not deleted - retained for inspection
 
-    # Verify Salaries Expense (account 5100: debit - credit)
-    expected_salaries = tb_data[5100]["debit"] - tb_data[5100]["credit"]
-    assert is_data["Salaries Expense"] == expected_salaries, f"Salaries should be {expected_salaries}"
 
-    # Verify Gross Profit
-    expected_gross_profit = expected_sales_revenue - expected_cogs
-    assert is_data["Gross Profit"] == expected_gross_profit, f"Gross Profit should be {expected_gross_profit}"
+def test_text_account_codes(test_workbook_with_text_codes):  # pylint: disable=redefined-outer-name
+    """Test that account codes stored as text are normalized to int."""
+    processor = TrialBalanceProcessor(test_workbook_with_text_codes)
+    processor.populate_trial_balance()
+    processor.populate_income_statement()
+    processor.commit()
 
-    # Verify Net Profit
-    expected_net_profit = expected_gross_profit - expected_salaries
-    assert is_data["Net Profit"] == expected_net_profit, f"Net Profit should be {expected_net_profit}"
+    # Reload the workbook to verify results
+    with reload_workbook(test_workbook_with_text_codes) as wb:
+        trial_sheet = wb["Trial_Balance"]
+        is_sheet = wb["Income_Statement"]
+
+        account_codes = [row[0] for row in trial_sheet.iter_rows(min_row=2, values_only=True) if row[0]]
+        assert all(isinstance(code, int) for code in account_codes), "Account codes should be ints"
+        assert set(account_codes) == EXPECTED_CODES, "All accounts should be populated"
+
+        # Sales Revenue and COGS would silently be 0 if the 4000/5000 lookups missed
+        rows = is_sheet.iter_rows(min_row=2, max_row=3, min_col=2, max_col=2, values_only=True)
+        sales_revenue, cogs = (row[0] for row in rows)
+        assert sales_revenue != 0, "Sales Revenue should be populated from text codes"
+        assert cogs != 0, "COGS should be populated from text codes"
+
+    # A Trial Balance whose own codes are text must still feed the statements
+    write_codes_as_text(test_workbook_with_text_codes, [("Trial_Balance", 1)])
+    processor = TrialBalanceProcessor(test_workbook_with_text_codes)
+    processor.populate_income_statement()
+    processor.commit()
 
-    # Verify all values are populated (not None)
-    for desc, value in is_data.items():
-        assert value is not None, f"{desc} should be populated"
+    with reload_workbook(test_workbook_with_text_codes) as wb:
+        rows = wb["Income_Statement"].iter_rows(min_row=2, max_row=3, min_col=2, max_col=2, values_only=True)
+        assert [row[0] for row in rows] == [sales_revenue, cogs], "Text Trial Balance codes should be read as int"
 
 
 @pytest.fixture
-def test_workbook_for_balance_sheet():
-    """Copy the existing Manufacturing_Accounting_Simple.xlsx for balance sheet test."""
-    source_file = "data/Manufacturing_Accounting_Simple.xlsx"
-    test_file = "data/test_balance_sheet_output.xlsx"
+def test_workbook_for_pipeline(source_bytes):  # pylint: disable=redefined-outer-name
+    """Copy the existing Manufacturing_Accounting_Simple.xlsx for the full pipeline test."""
+    test_file = "data/test_pipeline_output.xlsx"
 
     # Copy the existing file
-    shutil.copy(source_file, test_file)
+    Path(test_file).write_bytes(source_bytes)
     yield test_file
 
     # Note: Copy is not deleted - retained for inspection
 
 
-def test_populate_balance_sheet(test_workbook_for_balance_sheet):
-    """Test that Balance_Sheet sheet is correctly populated from Trial Balance."""
-    processor = TrialBalanceProcessor(test_workbook_for_balance_sheet)
+def test_populate_all_on_one_processor(test_workbook_for_pipeline):  # pylint: disable=redefined-outer-name
+    """Test populating every sheet with one processor and a single commit."""
+    processor = TrialBalanceProcessor(test_workbook_for_pipeline)
 
-    # First populate Trial Balance
+    # A statement built before the Trial Balance is populated sees it empty;
+    # populating the Trial Balance must make later statements see the new data
+    processor.populate_income_statement()
     processor.populate_trial_balance()
-
-    # Then populate Balance Sheet
+    processor.populate_income_statement()
     processor.populate_balance_sheet()
+    processor.commit()
 
     # Reload the workbook to verify results
-    from openpyxl import load_workbook
-
-    wb = load_workbook(test_workbook_for_balance_sheet)
-    tb_sheet = wb["Trial_Balance"]
-    bs_sheet = wb["Balance_Sheet"]
-
-    # Build Trial Balance data for verification
-    tb_data = {}
-    for row in tb_sheet.iter_rows(min_row=2, values_only=True):
-        if row[0]:
-            tb_data[row[0]] = {"debit": row[2] or 0, "credit": row[3] or 0}
-
-    # Read Balance Sheet values
-    # Assets are in rows 2-4, column 2
-    # Liabilities & Equity are in rows 2-4, column 4
-    assets = {
-        "Cash at Bank": bs_sheet.cell(row=2, column=2).value,
-        "Inventory": bs_sheet.cell(row=3, column=2).value,
-        "Accounts Receivable": bs_sheet.cell(row=4, column=2).value,
-    }
+    with reload_workbook(test_workbook_for_pipeline) as wb:
+        expected_amounts = expected_statement_amounts(wb["Trial_Balance"])
+        statement_data = {**read_income_statement(wb["Income_Statement"]), **read_balance_sheet(wb["Balance_Sheet"])}
 
-    liabilities_equity = {
-        "Equity Share Capital": bs_sheet.cell(row=2, column=4).value,
-        "Accounts Payable": bs_sheet.cell(row=3, column=4).value,
-        "Retained Earnings": bs_sheet.cell(row=4, column=4).value,
-    }
+        # Verify each line item
+        for label, actual in statement_data.items():
+            expected = expected_amounts[label]
+            assert actual == expected, f"{label} should be {expected}, got {actual}"
 
-    # Verify Asset amounts (Credit - Debit from Trial Balance)
-    expected_cash = tb_data[1000]["credit"] - tb_data[1000]["debit"]
-    expected_inventory = tb_data[1200]["credit"] - tb_data[1200]["debit"]
-    expected_ar = tb_data[1100]["credit"] - tb_data[1100]["debit"]
-
-    assert assets["Cash at Bank"] == expected_cash, f"Cash at Bank should be {expected_cash}"
-    assert assets["Inventory"] == expected_inventory, f"Inventory should be {expected_inventory}"
-    assert assets["Accounts Receivable"] == expected_ar, f"A/R should be {expected_ar}"
-
-    # Verify Liability & Equity amounts (Credit - Debit from Trial Balance)
-    expected_equity = tb_data[3000]["credit"] - tb_data[3000]["debit"]
-    expected_ap = tb_data[2000]["credit"] - tb_data[2000]["debit"]
-    expected_retained = tb_data[3100]["credit"] - tb_data[3100]["debit"]
-
-    assert (
-        liabilities_equity["Equity Share Capital"] == expected_equity
-    ), f"Equity Share Capital should be {expected_equity}"
-    assert (
-        liabilities_equity["Accounts Payable"] == expected_ap
-    ), f"Accounts Payable should be {expected_ap}"
-    assert (
-        liabilities_equity["Retained Earnings"] == expected_retained
-    ), f"Retained Earnings should be {expected_retained}"
-
-    # Verify all values are populated (not None)
-    for asset_name, amount in assets.items():
-        assert amount is not None, f"{asset_name} should be populated"
-    for le_name, amount in liabilities_equity.items():
-        assert amount is not None, f"{le_name} should be populated"
+        # A stale (empty) Trial Balance would have left every statement amount at 0
+        assert statement_data["Sales Revenue"] != 0, "Sales Revenue should come from the populated Trial Balance"